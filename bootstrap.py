@@ -0,0 +1,140 @@
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+from config import BRAND_NAME, COMPETITOR_BRANDS
+from metrics import row_contributions, _composite_weights, brand_sentiment_series, comment_mentions_column
+
+# Cap on resample-by-row cells materialised at once (keeps large snapshots bounded)
+_CHUNK_CELLS = 4_000_000
+
+
+def _ratio(num: np.ndarray, den: np.ndarray, empty: float = 0.0) -> np.ndarray:
+    # Empty denominators give `empty`: 0 for point estimates (compute_metrics' convention),
+    # NaN for resamples so draws where the ratio is undefined stay out of the percentiles
+    out = np.full(np.broadcast(num, den).shape, empty)
+    np.divide(num, den, out=out, where=den > 0)
+    return out * 100.0
+
+
+def _component(x: np.ndarray) -> np.ndarray:
+    # A ratio undefined in every resample has no data at all; the composite counts it
+    # as 0 like compute_metrics instead of becoming undefined itself
+    return np.zeros_like(x) if np.isnan(x).all() else x
+
+
+def _resampled_sums(X: np.ndarray, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """Column sums of X for every bootstrap resample, shape (n_resamples, X.shape[1])."""
+    n = X.shape[0]
+    chunk = max(1, min(n_resamples, _CHUNK_CELLS // max(n, 1)))
+    out = np.empty((n_resamples, X.shape[1]))
+    for start in range(0, n_resamples, chunk):
+        r = min(chunk, n_resamples - start)
+        idx = rng.integers(0, n, size=(r, n))
+        # Row multiplicities per resample, then one matmul for all metrics
+        counts = np.bincount((idx + (np.arange(r) * n)[:, None]).ravel(), minlength=r * n).reshape(r, n)
+        out[start:start + r] = counts @ X
+    return out
+
+
+def _interval(samples: np.ndarray, estimate: float, confidence: float) -> Dict:
+    alpha = (1.0 - confidence) / 2.0
+    undefined = int(np.isnan(samples).sum())
+    low = high = np.nan
+    if undefined < samples.size:
+        low, high = np.nanpercentile(samples, [alpha * 100, (1 - alpha) * 100])
+    return {'estimate': float(estimate), 'low': float(low), 'high': float(high), 'undefined': undefined}
+
+
+def _overall_columns(df: pd.DataFrame) -> np.ndarray:
+    atomberg = (df['atomberg_mention'] == True).to_numpy(dtype=float)
+    vis = df['visibility_weight'].to_numpy(dtype=float)
+    pos = df['comment_pos_rate'].to_numpy(dtype=float)
+    return np.column_stack([
+        np.ones(len(df)), atomberg,
+        df['atomberg_eng_value'].to_numpy(dtype=float), df['eng_value'].to_numpy(dtype=float),
+        vis * atomberg, vis,
+        df['comment_mentions_atomberg'].to_numpy(dtype=float), df['comment_mentions_total'].to_numpy(dtype=float),
+        np.nan_to_num(pos), (~np.isnan(pos)).astype(float),
+    ])
+
+
+def _overall_metrics(S: np.ndarray, empty: float = 0.0) -> Dict[str, np.ndarray]:
+    wb, we, ws, wv = _composite_weights()
+    m = {
+        'basic_sov': _ratio(S[..., 1], S[..., 0], empty),
+        'engagement_sov': _ratio(S[..., 2], S[..., 3], empty),
+        'visibility_weighted_sov': _ratio(S[..., 4], S[..., 5], empty),
+        'comments_sov': _ratio(S[..., 6], S[..., 7], empty),
+        # mean of per-video positive rates (already in %), `empty` when none mention the brand
+        'sentiment_sov': _ratio(S[..., 8], S[..., 9], empty) / 100.0,
+    }
+    m['composite_sov'] = (wb * _component(m['basic_sov']) + we * _component(m['engagement_sov'])
+                          + ws * _component(m['sentiment_sov']) + wv * _component(m['visibility_weighted_sov']))
+    return m
+
+
+def _brand_columns(df: pd.DataFrame, brands: List[str]) -> np.ndarray:
+    eng = df['engagement_norm'].to_numpy(dtype=float)
+    vis = df['visibility_weight'].to_numpy(dtype=float)
+    cols = [np.ones(len(df)), eng, vis, df['comment_mentions_total'].to_numpy(dtype=float)]
+    for b in brands:
+        member = df['brand_mentions'].apply(lambda x: b in x).to_numpy(dtype=float)
+        positive = (brand_sentiment_series(df, b).to_numpy() > 0.1).astype(float)
+        comments = df[comment_mentions_column(b)].to_numpy(dtype=float)
+        cols.extend([member, member * eng, member * vis, member * positive, comments])
+    return np.column_stack(cols)
+
+
+def _brand_metrics(S: np.ndarray, k: int, empty: float = 0.0) -> Dict[str, np.ndarray]:
+    wb, we, ws, wv = _composite_weights()
+    base = 4 + 5 * k
+    m = {
+        'basic_sov': _ratio(S[..., base], S[..., 0], empty),
+        'engagement_sov': _ratio(S[..., base + 1], S[..., 1], empty),
+        'visibility_sov': _ratio(S[..., base + 2], S[..., 2], empty),
+        'sentiment_positive_rate': _ratio(S[..., base + 3], S[..., base], empty),
+        'comments_sov': _ratio(S[..., base + 4], S[..., 3], empty),
+    }
+    m['composite_sov'] = (wb * _component(m['basic_sov']) + we * _component(m['engagement_sov'])
+                          + ws * _component(m['sentiment_positive_rate']) + wv * _component(m['visibility_sov']))
+    return m
+
+
+def _intervals(X: np.ndarray, metrics_fn, n_resamples: int, confidence: float,
+               rng: np.random.Generator) -> Dict[str, Dict]:
+    point = metrics_fn(X.sum(axis=0))
+    boot = metrics_fn(_resampled_sums(X, n_resamples, rng), np.nan)
+    return {name: _interval(boot[name], point[name], confidence) for name in point}
+
+
+def bootstrap_sov(df: pd.DataFrame, n_resamples: int = 2000, confidence: float = 0.95,
+                  seed: int | None = 0, contributions: pd.DataFrame | None = None) -> Dict:
+    """Percentile bootstrap CIs for the SoV metrics of an enriched frame.
+
+    Videos are resampled with replacement; estimates match compute_metrics.
+    Resamples where a ratio's denominator is empty are left out of its
+    percentiles and counted in `undefined`.
+    Returns overall, per-brand (brand_benchmark) and per-keyword intervals.
+    Pass the frame from metrics.row_contributions to skip recomputing it.
+    """
+    result = {'n_resamples': n_resamples, 'confidence': confidence, 'overall': {}, 'brands': {}, 'keywords': {}}
+    if df.empty:
+        return result
+    rng = np.random.default_rng(seed)
+    df = contributions if contributions is not None else row_contributions(df)
+    X = _overall_columns(df)
+    result['overall'] = _intervals(X, _overall_metrics, n_resamples, confidence, rng)
+    brands = [b for b in [BRAND_NAME] + COMPETITOR_BRANDS if df['brand_mentions'].apply(lambda x: b in x).any()]
+    if brands:
+        XB = _brand_columns(df, brands)
+        point = XB.sum(axis=0)
+        boot = _resampled_sums(XB, n_resamples, rng)
+        for k, b in enumerate(brands):
+            pm, bm = _brand_metrics(point, k), _brand_metrics(boot, k, np.nan)
+            result['brands'][b] = {name: _interval(bm[name], pm[name], confidence) for name in pm}
+    if 'keyword' in df.columns:
+        keys = df['keyword'].astype(object).fillna('').astype(str).to_numpy()
+        for kw in pd.unique(keys):
+            result['keywords'][kw] = _intervals(X[keys == kw], _overall_metrics, n_resamples, confidence, rng)
+    return result
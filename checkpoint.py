@@ -0,0 +1,380 @@
+"""Checkpointed, resumable YouTube extraction.
+
+A run lives in checkpoints/<run>/ledger.sqlite: a job ledger (search pages,
+video-stat batches, comment pages) plus a staging table that receives each job's
+results in the same transaction that marks it done. Interrupted runs continue
+with `python main.py --extract --resume`; extra workers can attach from another
+shell with `python checkpoint.py worker [ledger]`.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import pandas as pd
+import requests
+
+import collectors
+from config import CHECKPOINT_DIR, YOUTUBE_RESULTS_PER_KEYWORD, COMMENTS_PER_VIDEO
+
+MAX_ATTEMPTS = 6
+# Retry delay after the n-th failure: BACKOFF_SECONDS * 2**(n-1), capped, with jitter
+BACKOFF_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# 403 reasons that mean the project is out of quota; other 403s (commentsDisabled,
+# forbidden, ...) refuse one resource and will not succeed on retry
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+# Running jobs whose worker cannot be checked (other host) are reclaimed after this long
+LEASE_SECONDS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    claimed_at REAL,
+    not_before REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+CREATE TABLE IF NOT EXISTS results (job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS videos (video_id TEXT PRIMARY KEY);
+"""
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(_SCHEMA)
+    # Ledgers created before retry backoff lack not_before
+    if 'not_before' not in [r[1] for r in conn.execute('PRAGMA table_info(jobs)')]:
+        conn.execute('ALTER TABLE jobs ADD COLUMN not_before REAL')
+    return conn
+
+
+def _worker_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _add_job(conn: sqlite3.Connection, job_id: str, kind: str, payload: Dict):
+    conn.execute(
+        "INSERT OR IGNORE INTO jobs (id, seq, kind, payload) "
+        "VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs), ?, ?)",
+        (job_id, kind, json.dumps(payload)),
+    )
+
+
+def new_run(keywords: List[str], root: str = CHECKPOINT_DIR) -> str:
+    """Create a ledger seeded with one search job per keyword; returns its path."""
+    run_dir = os.path.join(root, datetime.now().strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, 'ledger.sqlite')
+    conn = _connect(path)
+    conn.execute('BEGIN IMMEDIATE')
+    for kw in keywords:
+        _add_job(conn, f'search:{kw}:', 'search', {'keyword': kw, 'page_token': None, 'fetched': 0})
+    conn.execute('COMMIT')
+    conn.close()
+    return path
+
+
+def latest_run(root: str = CHECKPOINT_DIR) -> str | None:
+    if not os.path.isdir(root):
+        return None
+    runs = sorted(d for d in os.listdir(root) if os.path.exists(os.path.join(root, d, 'ledger.sqlite')))
+    return os.path.join(root, runs[-1], 'ledger.sqlite') if runs else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _reclaim_dead(conn: sqlite3.Connection):
+    # Jobs left 'running' by a crashed process on this host go back to pending
+    host = socket.gethostname()
+    conn.execute('BEGIN IMMEDIATE')
+    for job_id, worker in conn.execute("SELECT id, worker FROM jobs WHERE status = 'running'").fetchall():
+        w_host, _, pid = (worker or '').rpartition(':')
+        if w_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+            conn.execute("UPDATE jobs SET status = 'pending', worker = NULL WHERE id = ?", (job_id,))
+    conn.execute('COMMIT')
+
+
+def reopen(path: str):
+    """Prepare a ledger for --resume: retry failed jobs and reclaim crashed ones."""
+    conn = _connect(path)
+    conn.execute("UPDATE jobs SET status = 'pending', attempts = 0, error = NULL, not_before = NULL WHERE status = 'failed'")
+    _reclaim_dead(conn)
+    conn.close()
+
+
+def _claim(conn: sqlite3.Connection, worker: str):
+    conn.execute('BEGIN IMMEDIATE')
+    now = time.time()
+    row = conn.execute(
+        "SELECT id, kind, payload FROM jobs "
+        "WHERE (status = 'pending' AND (not_before IS NULL OR not_before <= ?)) "
+        "OR (status = 'running' AND claimed_at < ?) ORDER BY seq LIMIT 1",
+        (now, now - LEASE_SECONDS),
+    ).fetchone()
+    if row:
+        conn.execute("UPDATE jobs SET status = 'running', worker = ?, claimed_at = ? WHERE id = ?",
+                     (worker, time.time(), row[0]))
+    conn.execute('COMMIT')
+    return row
+
+
+def _do_search(payload: Dict):
+    remaining = YOUTUBE_RESULTS_PER_KEYWORD - payload['fetched']
+    items, token = collectors._search_page(payload['keyword'], payload['page_token'], remaining)
+    items = items[:remaining]
+    rows = [collectors._video_row(item, payload['keyword']) for item in items]
+    for row in rows:
+        # Same text pandas wrote for datetimes in earlier snapshots (2025-09-02 15:14:18.462166)
+        row['published_date'] = str(row['published_date'])
+    nxt = None
+    if token and items and payload['fetched'] + len(items) < YOUTUBE_RESULTS_PER_KEYWORD:
+        nxt = {'keyword': payload['keyword'], 'page_token': token, 'fetched': payload['fetched'] + len(items)}
+    return rows, nxt
+
+
+def _do_stats(payload: Dict):
+    return collectors._video_stats_batch(payload['video_ids']), None
+
+
+def _do_comments(payload: Dict):
+    remaining = COMMENTS_PER_VIDEO - payload['fetched']
+    items, token = collectors._comment_page(payload['video_id'], payload['page_token'], remaining)
+    items = items[:remaining]
+    nxt = None
+    if token and items and payload['fetched'] + len(items) < COMMENTS_PER_VIDEO:
+        nxt = {'video_id': payload['video_id'], 'page_token': token, 'fetched': payload['fetched'] + len(items)}
+    return collectors._comment_rows(payload['video_id'], items), nxt
+
+
+_HANDLERS = {'search': _do_search, 'stats': _do_stats, 'comments': _do_comments}
+_EMPTY_RESULTS = {'search': [], 'stats': {}, 'comments': []}
+
+
+def _error_reason(response) -> str:
+    try:
+        errors = (response.json().get('error') or {}).get('errors') or [{}]
+        return errors[0].get('reason') or ''
+    except Exception:
+        return ''
+
+
+def _complete(conn: sqlite3.Connection, job_id: str, kind: str, data, nxt: Dict | None, error: str | None = None):
+    # Results, follow-up jobs and the done flag commit together
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('INSERT OR REPLACE INTO results (job_id, kind, data) VALUES (?, ?, ?)',
+                 (job_id, kind, json.dumps(data, default=str)))
+    if kind == 'search':
+        if nxt:
+            _add_job(conn, f"search:{nxt['keyword']}:{nxt['page_token']}", 'search', nxt)
+        new_ids = []
+        for vid in dict.fromkeys(collectors._video_id(r['url']) for r in data):
+            if conn.execute('INSERT OR IGNORE INTO videos (video_id) VALUES (?)', (vid,)).rowcount:
+                new_ids.append(vid)
+        if new_ids:
+            digest = hashlib.sha1(','.join(new_ids).encode('utf-8')).hexdigest()[:16]
+            _add_job(conn, f'stats:{digest}', 'stats', {'video_ids': new_ids})
+        for vid in new_ids:
+            _add_job(conn, f'comments:{vid}:', 'comments', {'video_id': vid, 'page_token': None, 'fetched': 0})
+    elif kind == 'comments' and nxt:
+        _add_job(conn, f"comments:{nxt['video_id']}:{nxt['page_token']}", 'comments', nxt)
+    conn.execute("UPDATE jobs SET status = 'done', finished_at = ?, error = ? WHERE id = ?", (time.time(), error, job_id))
+    conn.execute('COMMIT')
+
+
+def _release(conn: sqlite3.Connection, job_id: str, error: str):
+    # Failed attempt (429, 5xx, network): retry later with exponential backoff
+    attempts = conn.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()[0] + 1
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+    conn.execute(
+        "UPDATE jobs SET attempts = ?, error = ?, worker = NULL, not_before = ?, "
+        "status = CASE WHEN ? >= ? THEN 'failed' ELSE 'pending' END WHERE id = ?",
+        (attempts, error[:500], time.time() + delay, attempts, MAX_ATTEMPTS, job_id),
+    )
+
+
+def _unclaim(conn: sqlite3.Connection, job_id: str):
+    # Back to pending without counting an attempt (the job itself did not fail)
+    conn.execute("UPDATE jobs SET status = 'pending', worker = NULL WHERE id = ?", (job_id,))
+
+
+def run_worker(path: str, max_jobs: int | None = None) -> int:
+    """Claim and run jobs until the ledger is drained or quota runs out; returns jobs done."""
+    conn = _connect(path)
+    _reclaim_dead(conn)
+    worker = _worker_id()
+    done = 0
+    try:
+        while max_jobs is None or done < max_jobs:
+            job = _claim(conn, worker)
+            if not job:
+                # Others may still add follow-up jobs, or pending jobs are backing off
+                if conn.execute("SELECT 1 FROM jobs WHERE status IN ('running', 'pending') LIMIT 1").fetchone():
+                    time.sleep(0.5)
+                    _reclaim_dead(conn)
+                    continue
+                break
+            job_id, kind, payload = job
+            try:
+                data, nxt = _HANDLERS[kind](json.loads(payload))
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                reason = _error_reason(e.response) if e.response is not None else ''
+                if status == 403 and reason in QUOTA_REASONS:
+                    _unclaim(conn, job_id)
+                    raise QuotaExhausted(f'{reason}: {e}')
+                if status == 403:
+                    # Permanent refusal for this resource; stage an empty result like _video_comments did
+                    _complete(conn, job_id, kind, _EMPTY_RESULTS[kind], None, error=f'403 {reason}'.strip())
+                    continue
+                _release(conn, job_id, str(e))
+                continue
+            except Exception as e:
+                _release(conn, job_id, repr(e))
+                continue
+            _complete(conn, job_id, kind, data, nxt)
+            done += 1
+    except QuotaExhausted as e:
+        print(f'  [{worker}] stopping, quota exhausted: {e}')
+    finally:
+        conn.close()
+    return done
+
+
+def run_workers(path: str, workers: int = 1):
+    if workers <= 1:
+        run_worker(path)
+        return
+    procs = [multiprocessing.Process(target=run_worker, args=(path,)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+def progress(path: str) -> Dict[str, Dict[str, int]]:
+    conn = _connect(path)
+    out: Dict[str, Dict[str, int]] = {}
+    for kind, status, n in conn.execute('SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status'):
+        out.setdefault(kind, {})[status] = n
+    conn.close()
+    return out
+
+
+def unfinished(path: str) -> int:
+    """Jobs still pending, running or failed; 0 means the run is complete."""
+    conn = _connect(path)
+    n = conn.execute("SELECT COUNT(*) FROM jobs WHERE status != 'done'").fetchone()[0]
+    conn.close()
+    return n
+
+
+def assemble(path: str) -> pd.DataFrame:
+    """Build the collect_for_keywords frame from staged results."""
+    conn = _connect(path)
+    staged = conn.execute(
+        'SELECT r.kind, j.payload, r.data FROM results r JOIN jobs j ON j.id = r.job_id ORDER BY j.seq'
+    ).fetchall()
+    conn.close()
+    pages: List = []
+    keyword_order: Dict[str, int] = {}
+    stats: Dict[str, Dict] = {}
+    comments: List[Dict] = []
+    for kind, payload, data in staged:
+        data = json.loads(data)
+        if kind == 'search':
+            # Later pages are queued behind other keywords; restore keyword-then-page order
+            payload = json.loads(payload)
+            order = keyword_order.setdefault(payload['keyword'], len(keyword_order))
+            pages.append((order, payload['fetched'], data))
+        elif kind == 'stats':
+            stats.update(data)
+        else:
+            comments.extend(data)
+    rows = [row for _, _, data in sorted(pages, key=lambda p: p[:2]) for row in data]
+    df = pd.DataFrame(rows)
+    if df.empty or 'url' not in df.columns:
+        return df
+    empty = {'views': 0, 'likes': 0, 'comments': 0, 'engagement_score': 0}
+    df['engagement_metrics'] = [stats.get(collectors._video_id(u), empty) for u in df['url']]
+    return collectors.attach_comments(df, comments)
+
+
+def run_keywords(path: str) -> List[str]:
+    """Keywords a ledger was seeded with, in seed order."""
+    conn = _connect(path)
+    payloads = conn.execute("SELECT payload FROM jobs WHERE kind = 'search' ORDER BY seq").fetchall()
+    conn.close()
+    seeds = [json.loads(p) for (p,) in payloads]
+    return list(dict.fromkeys(p['keyword'] for p in seeds if not p.get('page_token')))
+
+
+def extract(keywords: List[str], resume: bool = False, workers: int = 1) -> (pd.DataFrame | None, bool):
+    """Run (or resume) a checkpointed extraction; returns the frame and whether every job finished.
+
+    With resume, a latest run that is already complete is left alone and the
+    frame is None (its snapshot was written when it finished).
+    """
+    path = latest_run() if resume else None
+    if path and not unfinished(path):
+        print(f'Nothing to resume: {path} is complete. Use --extract without --resume for a new run.')
+        return None, True
+    if path:
+        seeded = run_keywords(path)
+        if seeded != list(keywords):
+            missing = [k for k in keywords if k not in seeded]
+            extra = [k for k in seeded if k not in keywords]
+            print(f'Warning: {path} was started with different keywords; resuming with its own list '
+                  f'(missing {missing or "none"}, extra {extra or "none"}).')
+        reopen(path)
+        print(f'Resuming {path}')
+    else:
+        path = new_run(keywords)
+        print(f'New extraction run {path}')
+    run_workers(path, workers)
+    for kind, counts in progress(path).items():
+        print(f'  {kind}: ' + ', '.join(f'{s}={n}' for s, n in sorted(counts.items())))
+    remaining = unfinished(path)
+    if remaining:
+        print(f'  {remaining} jobs unfinished in {path}')
+    return assemble(path), remaining == 0
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    cmd = args[0] if args else 'status'
+    ledger = args[1] if len(args) > 1 else latest_run()
+    if not ledger:
+        raise SystemExit('No checkpointed run found.')
+    if cmd == 'worker':
+        print(f'Worker {_worker_id()} finished {run_worker(ledger)} jobs')
+    else:
+        print(json.dumps(progress(ledger), indent=2))
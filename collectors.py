@@ -6,7 +6,7 @@ import pandas as pd
 
 from config import (
     GOOGLE_API_KEY, GOOGLE_CX, RESULTS_PER_KEYWORD, GOOGLE_MAX_RESULTS_TOTAL,
-    GOOGLE_TIMEOUT_SECONDS, YOUTUBE_API_KEY, YOUTUBE_RESULTS_PER_KEYWORD, COMMENTS_PER_VIDEO
+    GOOGLE_TIMEOUT_SECONDS, YOUTUBE_API_KEY, YOUTUBE_API_BASE_URL, YOUTUBE_RESULTS_PER_KEYWORD, COMMENTS_PER_VIDEO
 )
 
 def search_google(keyword: str, quota_left: int) -> (List[Dict], int):
@@ -61,95 +61,156 @@ def search_google(keyword: str, quota_left: int) -> (List[Dict], int):
         time.sleep(0.2)
     return results, quota_left
 
+def _search_page(keyword: str, page_token: str | None = None, max_results: int = 50) -> (List[Dict], str | None):
+    """One search.list call; raises on HTTP errors so callers can retry."""
+    params = {
+        'key': YOUTUBE_API_KEY,
+        'part': 'snippet',
+        'q': keyword,
+        'type': 'video',
+        'maxResults': max(1, min(50, max_results)),
+        'order': 'relevance'
+    }
+    if page_token:
+        params['pageToken'] = page_token
+    resp = requests.get(f'{YOUTUBE_API_BASE_URL}/search', params=params, timeout=30)
+    resp.raise_for_status()
+    data = resp.json()
+    return data.get('items', []), data.get('nextPageToken')
+
+def _video_row(item: Dict, keyword: str) -> Dict:
+    snippet = item.get('snippet', {})
+    video_id = (item.get('id') or {}).get('videoId')
+    return {
+        'platform': 'YouTube',
+        'title': snippet.get('title', ''),
+        'description': snippet.get('description', ''),
+        'channel_title': snippet.get('channelTitle', ''),
+        'url': f"https://www.youtube.com/watch?v={video_id}",
+        'published_date': datetime.now(),
+        'engagement_metrics': None,
+        'keyword': keyword,
+        'raw_text': f"{snippet.get('title', '')} {snippet.get('description', '')}",
+        'rank': None
+    }
+
 def search_youtube(keyword: str) -> List[Dict]:
     if not YOUTUBE_API_KEY:
         return []
-    try:
-        params = {
-            'key': YOUTUBE_API_KEY,
-            'part': 'snippet',
-            'q': keyword,
-            'type': 'video',
-            'maxResults': min(50, YOUTUBE_RESULTS_PER_KEYWORD),
-            'order': 'relevance'
-        }
-        resp = requests.get('https://www.googleapis.com/youtube/v3/search', params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        items = data.get('items', [])
-    except Exception:
-        return []
+    items: List[Dict] = []
+    token = None
+    # Follow nextPageToken when the server returns short pages
+    while len(items) < YOUTUBE_RESULTS_PER_KEYWORD:
+        try:
+            page, token = _search_page(keyword, token, YOUTUBE_RESULTS_PER_KEYWORD - len(items))
+        except Exception:
+            break
+        items.extend(page)
+        if not token or not page:
+            break
     rows: List[Dict] = []
-    for item in items:
-        snippet = item.get('snippet', {})
-        video_id = (item.get('id') or {}).get('videoId')
-        rows.append({
-            'platform': 'YouTube',
-            'title': snippet.get('title', ''),
-            'description': snippet.get('description', ''),
-            'channel_title': snippet.get('channelTitle', ''),
-            'url': f"https://www.youtube.com/watch?v={video_id}",
-            'published_date': datetime.now(),
-            'engagement_metrics': _video_stats(video_id),
-            'keyword': keyword,
-            'raw_text': f"{snippet.get('title', '')} {snippet.get('description', '')}",
-            'rank': None
-        })
+    for item in items[:YOUTUBE_RESULTS_PER_KEYWORD]:
+        row = _video_row(item, keyword)
+        row['engagement_metrics'] = _video_stats((item.get('id') or {}).get('videoId'))
+        rows.append(row)
     return rows
 
+def _video_id(url: str) -> str:
+    return str(url or '').replace('https://www.youtube.com/watch?v=', '')
+
+def _stats_metrics(stats: Dict) -> Dict:
+    views = int(stats.get('viewCount', 0))
+    likes = int(stats.get('likeCount', 0))
+    comments = int(stats.get('commentCount', 0))
+    engagement_score = (likes + comments * 3) / max(views / 1000, 1)
+    return {'views': views, 'likes': likes, 'comments': comments, 'engagement_score': engagement_score}
+
+def _video_stats_batch(video_ids: List[str]) -> Dict[str, Dict]:
+    """One videos.list call for up to 50 ids; raises on HTTP errors."""
+    params = {'key': YOUTUBE_API_KEY, 'part': 'statistics', 'id': ','.join(video_ids[:50])}
+    resp = requests.get(f'{YOUTUBE_API_BASE_URL}/videos', params=params, timeout=30)
+    resp.raise_for_status()
+    data = resp.json()
+    return {item.get('id'): _stats_metrics(item.get('statistics', {})) for item in data.get('items') or []}
+
 def _video_stats(video_id: str) -> Dict:
     if not video_id or not YOUTUBE_API_KEY:
         return {'views': 0, 'likes': 0, 'comments': 0, 'engagement_score': 0}
+    try:
+        return _video_stats_batch([video_id]).get(video_id) or _stats_metrics({})
+    except Exception:
+        return {'views': 0, 'likes': 0, 'comments': 0, 'engagement_score': 0}
+
+def _comment_page(video_id: str, page_token: str | None = None, max_results: int = 100) -> (List[Dict], str | None):
+    """One commentThreads.list call; raises on HTTP errors so callers can retry."""
+    params = {
+        'key': YOUTUBE_API_KEY,
+        'part': 'snippet,replies',
+        'videoId': video_id,
+        'maxResults': max(1, min(100, max_results)),
+        'order': 'relevance',
+        'textFormat': 'plainText'
+    }
+    if page_token:
+        params['pageToken'] = page_token
+    resp = requests.get(f'{YOUTUBE_API_BASE_URL}/commentThreads', params=params, timeout=30)
+    resp.raise_for_status()
+    data = resp.json()
+    return data.get('items', []), data.get('nextPageToken')
 
 def _video_comments(video_id: str) -> List[Dict]:
     rows: List[Dict] = []
     if not YOUTUBE_API_KEY or not video_id:
         return rows
+    threads = 0
+    token = None
     try:
-        params = {
-            'key': YOUTUBE_API_KEY,
-            'part': 'snippet,replies',
-            'videoId': video_id,
-            'maxResults': min(100, COMMENTS_PER_VIDEO),
-            'order': 'relevance',
-            'textFormat': 'plainText'
-        }
-        resp = requests.get('https://www.googleapis.com/youtube/v3/commentThreads', params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        for item in data.get('items', []):
-            snippet = ((item.get('snippet') or {}).get('topLevelComment') or {}).get('snippet') or {}
-            text = snippet.get('textDisplay') or ''
-            clikes = int(snippet.get('likeCount', 0) or 0)
-            rows.append({'video_id': video_id, 'comment_text': text, 'comment_likes': clikes})
-            # include replies if present
-            replies = (item.get('replies') or {}).get('comments') or []
-            for r in replies:
-                rs = (r.get('snippet') or {})
-                rt = rs.get('textDisplay') or ''
-                rlikes = int(rs.get('likeCount', 0) or 0)
-                if rt:
-                    rows.append({'video_id': video_id, 'comment_text': rt, 'comment_likes': rlikes})
+        while threads < COMMENTS_PER_VIDEO:
+            page, token = _comment_page(video_id, token, COMMENTS_PER_VIDEO - threads)
+            page = page[:COMMENTS_PER_VIDEO - threads]
+            threads += len(page)
+            rows.extend(_comment_rows(video_id, page))
+            if not token or not page:
+                break
     except Exception:
         return rows
     return rows
-    try:
-        params = {'key': YOUTUBE_API_KEY, 'part': 'statistics', 'id': video_id}
-        resp = requests.get('https://www.googleapis.com/youtube/v3/videos', params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        stats = (data.get('items') or [{}])[0].get('statistics', {})
-        views = int(stats.get('viewCount', 0))
-        likes = int(stats.get('likeCount', 0))
-        comments = int(stats.get('commentCount', 0))
-        engagement_score = (likes + comments * 3) / max(views / 1000, 1)
-        return {'views': views, 'likes': likes, 'comments': comments, 'engagement_score': engagement_score}
-    except Exception:
-        return {'views': 0, 'likes': 0, 'comments': 0, 'engagement_score': 0}
+
+def _comment_rows(video_id: str, items: List[Dict]) -> List[Dict]:
+    rows: List[Dict] = []
+    for item in items:
+        snippet = ((item.get('snippet') or {}).get('topLevelComment') or {}).get('snippet') or {}
+        text = snippet.get('textDisplay') or ''
+        clikes = int(snippet.get('likeCount', 0) or 0)
+        rows.append({'video_id': video_id, 'comment_text': text, 'comment_likes': clikes})
+        # include replies if present
+        replies = (item.get('replies') or {}).get('comments') or []
+        for r in replies:
+            rs = (r.get('snippet') or {})
+            rt = rs.get('textDisplay') or ''
+            rlikes = int(rs.get('likeCount', 0) or 0)
+            if rt:
+                rows.append({'video_id': video_id, 'comment_text': rt, 'comment_likes': rlikes})
+    return rows
+
+def attach_comments(df: pd.DataFrame, comments: List[Dict]) -> pd.DataFrame:
+    """Aggregate comment rows per video into all_comments."""
+    comments_df = pd.DataFrame(comments)
+    if comments_df.empty:
+        return df
+    agg = comments_df.groupby('video_id', sort=False)['comment_text'].apply(lambda s: '\n'.join(s.astype(str))).reset_index()
+    agg.rename(columns={'video_id': 'videoId', 'comment_text': 'all_comments'}, inplace=True)
+    df['videoId'] = df['url'].map(_video_id)
+    # raw_text stays title + description; comment text lives only in all_comments
+    return df.merge(agg, how='left', on='videoId')
 
 def collect_for_keywords(keywords: List[str]) -> pd.DataFrame:
+    """Legacy in-memory extraction (one videos.list call per video, errors drop data).
+
+    main.py extracts through checkpoint.extract; this is kept for quick scripts and
+    `loadtest.py --mode legacy`.
+    """
     rows: List[Dict] = []
-    google_quota = 0
     for kw in keywords:
         y_rows = search_youtube(kw)
         rows.extend(y_rows)
@@ -158,16 +219,6 @@ def collect_for_keywords(keywords: List[str]) -> pd.DataFrame:
         return df
     # Fetch comments for each video
     comments: List[Dict] = []
-    for vid in df['url'].str.replace('https://www.youtube.com/watch?v=', '', regex=False).dropna().unique():
+    for vid in df['url'].map(_video_id).dropna().unique():
         comments.extend(_video_comments(vid))
-    comments_df = pd.DataFrame(comments)
-    # Aggregate comments per video
-    if not comments_df.empty:
-        agg = comments_df.groupby('video_id')['comment_text'].apply(lambda s: '\n'.join(s.astype(str))).reset_index()
-        agg.rename(columns={'video_id': 'videoId', 'comment_text': 'all_comments'}, inplace=True)
-        df['videoId'] = df['url'].str.replace('https://www.youtube.com/watch?v=', '', regex=False)
-        df = df.merge(agg, how='left', on='videoId')
-        df['raw_text'] = (df['raw_text'].fillna('') + ' ' + df['all_comments'].fillna('')).str.strip()
-    return df
-
-
+    return attach_comments(df, comments)
@@ -11,6 +11,8 @@ COMPETITOR_BRANDS = [b.strip() for b in os.getenv('COMPETITOR_BRANDS', 'Havells,
 GOOGLE_API_KEY = None
 GOOGLE_CX = None
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+# Point at a local stand-in (see mock_youtube.py) to run collectors without spending quota
+YOUTUBE_API_BASE_URL = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3').rstrip('/')
 
 # Limits and pagination
 RESULTS_PER_KEYWORD = int(os.getenv('SEARCH_RESULTS_PER_PLATFORM', '10'))
@@ -20,6 +22,9 @@ GOOGLE_TIMEOUT_SECONDS = 0
 YOUTUBE_RESULTS_PER_KEYWORD = min(50, int(os.getenv('YOUTUBE_RESULTS_PER_KEYWORD', '15')))
 COMMENTS_PER_VIDEO = min(100, int(os.getenv('COMMENTS_PER_VIDEO', '50')))
 
+# Tokens kept either side of a brand mention when scoring brand-targeted sentiment
+SENTIMENT_WINDOW_TOKENS = int(os.getenv('SENTIMENT_WINDOW_TOKENS', '12'))
+
 # Composite SoV weights
 SOV_WEIGHT_BASIC = float(os.getenv('SOV_WEIGHT_BASIC', '0.40'))
 SOV_WEIGHT_ENGAGEMENT = float(os.getenv('SOV_WEIGHT_ENGAGEMENT', '0.30'))
@@ -30,5 +35,6 @@ SOV_WEIGHT_VISIBILITY = float(os.getenv('SOV_WEIGHT_VISIBILITY', '0.10'))
 PLOTS_DIR = 'plots'
 REPORTS_DIR = 'reports'
 EMBEDDINGS_DIR = 'embeddings'
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', 'checkpoints')
 
 
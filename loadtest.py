@@ -0,0 +1,144 @@
+"""Offline load test for YouTube extraction against the mock YouTube API.
+
+Runs extraction at several concurrency levels and reports throughput and request
+counts. No real quota is spent. The default `ledger` mode drives the checkpointed
+path main.py uses (batched stats, retries, worker processes) on a temporary
+ledger; `legacy` drives collect_for_keywords' per-video path with threads.
+
+    python loadtest.py --concurrency 1,4,8 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import checkpoint
+import collectors
+from config import YOUTUBE_RESULTS_PER_KEYWORD, COMMENTS_PER_VIDEO
+from mock_youtube import MockYouTubeServer
+
+
+def _extract_legacy(keywords: List[str], workers: int) -> Dict:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        per_keyword = list(pool.map(collectors.search_youtube, keywords))
+        videos = [row for rows in per_keyword for row in rows]
+        ids = list(dict.fromkeys(collectors._video_id(r['url']) for r in videos))
+        per_video = list(pool.map(collectors._video_comments, ids))
+    views = {collectors._video_id(r['url']): (r['engagement_metrics'] or {}).get('views', 0) for r in videos}
+    return {
+        'videos': len(videos), 'unique_videos': len(ids), 'comments': sum(len(cs) for cs in per_video),
+        'by_keyword': {kw: len(rows) for kw, rows in zip(keywords, per_keyword)},
+        'by_video': {vid: (views.get(vid, 0), len(cs)) for vid, cs in zip(ids, per_video)},
+    }
+
+
+def _extract_ledger(keywords: List[str], workers: int) -> Dict:
+    with tempfile.TemporaryDirectory() as root:
+        path = checkpoint.new_run(keywords, root=root)
+        checkpoint.run_workers(path, workers)
+        df = checkpoint.assemble(path)
+    if df.empty:
+        return {'videos': 0, 'unique_videos': 0, 'comments': 0, 'by_keyword': {}, 'by_video': {}}
+    by_video = {}
+    for row in df.drop_duplicates('url').to_dict('records'):
+        text = row.get('all_comments')
+        n = len([c for c in text.split('\n') if c.strip()]) if isinstance(text, str) else 0
+        by_video[collectors._video_id(row['url'])] = ((row['engagement_metrics'] or {}).get('views', 0), n)
+    return {
+        'videos': len(df), 'unique_videos': len(by_video), 'comments': sum(n for _, n in by_video.values()),
+        'by_keyword': df.groupby('keyword', sort=False).size().to_dict(),
+        'by_video': by_video,
+    }
+
+
+def _dropped(server: MockYouTubeServer, keywords: List[str], by_keyword: Dict, by_video: Dict) -> Dict:
+    """Keywords and videos that came back short of what the mock serves (errors swallowed or given up)."""
+    kw_short = 0
+    expected_ids: Dict[str, None] = {}
+    for kw in keywords:
+        ids = server.data.search(kw)[:YOUTUBE_RESULTS_PER_KEYWORD]
+        expected_ids.update(dict.fromkeys(ids))
+        if by_keyword.get(kw, 0) < len(ids):
+            kw_short += 1
+    vid_short = 0
+    for vid in expected_ids:
+        views, n = by_video.get(vid, (0, 0))
+        # Mock views are never 0, so 0 means the stats call was lost
+        if not views or n < min(len(server.data.comments.get(vid, [])), COMMENTS_PER_VIDEO):
+            vid_short += 1
+    return {'dropped_keywords': kw_short, 'dropped_videos': vid_short}
+
+
+_MODES = {'ledger': _extract_ledger, 'legacy': _extract_legacy}
+
+
+def run(server: MockYouTubeServer, keywords: List[str], levels: List[int], mode: str = 'ledger') -> List[Dict]:
+    # Collectors read these module globals at call time; the environment covers
+    # worker processes started with spawn, which re-import config
+    collectors.YOUTUBE_API_BASE_URL = server.url
+    collectors.YOUTUBE_API_KEY = collectors.YOUTUBE_API_KEY or 'mock-key'
+    os.environ['YOUTUBE_API_BASE_URL'] = server.url
+    os.environ['YOUTUBE_API_KEY'] = collectors.YOUTUBE_API_KEY
+    extract = _MODES[mode]
+    results = []
+    for workers in levels:
+        server.reset_stats()
+        t0 = time.perf_counter()
+        counts = extract(keywords, workers)
+        elapsed = time.perf_counter() - t0
+        stats = server.stats()
+        by_keyword, by_video = counts.pop('by_keyword'), counts.pop('by_video')
+        results.append({
+            'mode': mode,
+            'workers': workers,
+            'seconds': elapsed,
+            **counts,
+            **_dropped(server, keywords, by_keyword, by_video),
+            'videos_per_s': counts['videos'] / elapsed if elapsed > 0 else 0.0,
+            'comments_per_s': counts['comments'] / elapsed if elapsed > 0 else 0.0,
+            **stats,
+        })
+    return results
+
+
+def _print_table(results: List[Dict]):
+    print('=' * 116)
+    print(f"{'workers':>7} {'secs':>7} {'videos':>7} {'comments':>9} {'vid/s':>8} {'cmt/s':>9} "
+          f"{'search':>7} {'videos':>7} {'threads':>8} {'errors':>7} {'quota':>7} {'drop kw':>7} {'drop vid':>8}")
+    for r in results:
+        req = r['requests']
+        print(f"{r['workers']:>7} {r['seconds']:>7.2f} {r['videos']:>7} {r['comments']:>9} "
+              f"{r['videos_per_s']:>8.1f} {r['comments_per_s']:>9.1f} {req['search']:>7} {req['videos']:>7} "
+              f"{req['commentThreads']:>8} {sum(r['errors'].values()):>7} {r['quota_used']:>7} "
+              f"{r['dropped_keywords']:>7} {r['dropped_videos']:>8}")
+    print('=' * 116)
+    if any(r['dropped_keywords'] or r['dropped_videos'] for r in results):
+        print('Rows with dropped keywords/videos did less work; their rates are not directly comparable.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure extraction throughput against the mock YouTube API.')
+    parser.add_argument('csv', nargs='?', default=None)
+    parser.add_argument('--mode', choices=sorted(_MODES), default='ledger',
+                        help='ledger: checkpoint workers (what main.py runs); legacy: collect_for_keywords path')
+    parser.add_argument('--concurrency', default='1,2,4,8', help='comma-separated worker counts')
+    parser.add_argument('--keywords', default=None, help='comma-separated keywords (default: snapshot keywords)')
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--quota', type=int, default=None)
+    args = parser.parse_args()
+    levels = [int(x) for x in args.concurrency.split(',') if x.strip()]
+    with MockYouTubeServer(args.csv, latency=args.latency, jitter=args.jitter, page_size=args.page_size,
+                           error_rate=args.error_rate, quota_limit=args.quota) as server:
+        keywords = [k.strip() for k in args.keywords.split(',')] if args.keywords else \
+            [k for k in server.data.by_keyword if k]
+        print(f'Mock API {server.url}: {len(server.data.videos)} videos, {len(keywords)} keywords, {args.mode} mode')
+        _print_table(run(server, keywords, levels, args.mode))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,10 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 
-from metrics import enrich_dataframe, compute_metrics
+from metrics import enrich_dataframe, compute_metrics, row_contributions, iter_full_text, memory_report
+from bootstrap import bootstrap_sov
 from visuals import AtombergAIAgent
-from collectors import collect_for_keywords
+from checkpoint import extract
 from config import REPORTS_DIR
 from nlp_utils import extract_brand_mentions
 
@@ -51,8 +52,11 @@ def main():
     args = sys.argv[1:]
     csv_arg = args[0] if args and not args[0].startswith('--') else None
     do_extract = ('--extract' in args)
+    resume = ('--resume' in args)
+    show_memory = ('--memory' in args)
+    workers = int(args[args.index('--workers') + 1]) if '--workers' in args else 1
 
-    if do_extract or (not csv_arg and not _find_latest_csv()):
+    if do_extract or resume or (not csv_arg and not _find_latest_csv()):
         print('Extracting YouTube data...')
         keywords = [
             'smart fan', 'ceiling fan', 'atomberg fan', 'energy efficient fan',
@@ -60,17 +64,29 @@ def main():
             'atomberg ceiling fan', 'energy saving fan', 'smart home fan', 'IoT fan',
             'atomberg BLDC', 'atomberg energy efficient', 'smart ceiling fan review'
         ]
-        rows = collect_for_keywords(keywords)
+        rows, complete = extract(keywords, resume=resume, workers=workers)
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         os.makedirs(REPORTS_DIR, exist_ok=True)
-        out_path = os.path.join(REPORTS_DIR, f'sov_extracted_{ts}.csv')
-        rows.to_csv(out_path, index=False)
-        print(f'Saved: {out_path}')
-        csv_arg = out_path
+        if rows is None:
+            print('Processing the latest snapshot instead.')
+        elif not complete:
+            # Not a snapshot: the sov_partial_ prefix keeps it out of _find_latest_csv
+            partial_path = os.path.join(REPORTS_DIR, f'sov_partial_{ts}.csv')
+            rows.to_csv(partial_path, index=False)
+            print(f'Extraction incomplete; partial data saved to {partial_path} (not processed).')
+            print('Run `python main.py --extract --resume` to finish it.')
+            return
+        else:
+            out_path = os.path.join(REPORTS_DIR, f'sov_extracted_{ts}.csv')
+            rows.to_csv(out_path, index=False)
+            print(f'Saved: {out_path}')
+            csv_arg = out_path
 
     df = load_latest_csv(csv_arg)
     df = enrich_dataframe(df)
-    metrics = compute_metrics(df)
+    # One pass over comments/brands feeds both the point metrics and the bootstrap
+    contributions = row_contributions(df) if not df.empty else None
+    metrics = compute_metrics(df, contributions=contributions)
 
     print('=' * 70)
     print('OFFLINE METRICS (from CSV, no API calls)')
@@ -87,7 +103,25 @@ def main():
         print(f"Eng Atomberg: {totals.get('eng_atomberg', 0):.2f}")
         print(f"Comment Mentions Total: {totals.get('comment_mentions_total', 0)}")
         print(f"Comment Mentions Atomberg: {totals.get('comment_mentions_atomberg', 0)}")
+    intervals = bootstrap_sov(df, contributions=contributions)
+    metrics['confidence_intervals'] = intervals
+    if intervals['overall']:
+        print('-' * 70)
+        print(f"Bootstrap {intervals['confidence'] * 100:.0f}% CI ({intervals['n_resamples']} resamples)")
+        for name, label in [('basic_sov', 'Basic SoV'), ('engagement_sov', 'Engagement SoV'),
+                            ('visibility_weighted_sov', 'Visibility SoV'), ('comments_sov', 'Comments SoV'),
+                            ('sentiment_sov', 'Positive Share'), ('composite_sov', 'Composite Index')]:
+            ci = intervals['overall'][name]
+            note = f" ({ci['undefined']} resamples undefined)" if ci['undefined'] else ''
+            print(f"{label}: {ci['estimate']:.2f}% [{ci['low']:.2f}, {ci['high']:.2f}]{note}")
     print('=' * 70)
+    if show_memory:
+        report = memory_report(df)
+        print('MEMORY (bytes per column, deep)')
+        for col, row in report.iterrows():
+            print(f"{col:<28} {row['dtype']:<12} {int(row['bytes']):>12,} {row['share_pct']:>6.1f}%")
+        print(f"{'TOTAL':<28} {'':<12} {int(report['bytes'].sum()):>12,}")
+        print('=' * 70)
 
     agent = AtombergAIAgent()
     embedding_analysis = {
@@ -95,12 +129,11 @@ def main():
         'tfidf_2d': np.zeros((0, 2)),
         'cluster_labels': np.array([])
     }
-    df_plot = df.copy()
-    if 'brand_mentions' not in df_plot.columns:
-        df_plot['brand_mentions'] = df_plot['raw_text'].apply(extract_brand_mentions)
-    if 'keyword' not in df_plot.columns:
-        df_plot['keyword'] = 'all'
-    agent._create_ai_visualizations(df_plot, metrics, {}, embedding_analysis)
+    if 'brand_mentions' not in df.columns:
+        df['brand_mentions'] = [extract_brand_mentions(t) for t in iter_full_text(df)]
+    if 'keyword' not in df.columns:
+        df['keyword'] = 'all'
+    agent._create_ai_visualizations(df, metrics, {}, embedding_analysis)
 
 
 if __name__ == '__main__':
@@ -1,4 +1,5 @@
 from typing import Dict
+import re
 import pandas as pd
 import numpy as np
 
@@ -6,14 +7,39 @@ from config import (
     BRAND_NAME, COMPETITOR_BRANDS,
     SOV_WEIGHT_BASIC, SOV_WEIGHT_ENGAGEMENT, SOV_WEIGHT_SENTIMENT, SOV_WEIGHT_VISIBILITY
 )
-from nlp_utils import sentiment_scores, extract_brand_mentions, preprocess_text
+from nlp_utils import sentiment_scores, extract_brand_mentions, brand_sentiment, brand_variants
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['platform', 'keyword', 'channel_title', 'sentiment_overall']
+# Derived scores; float32 precision is ample for ranks, log-views and VADER compounds
+FLOAT32_COLUMNS = ['engagement_score', 'engagement_norm', 'visibility_weight', 'brand_adjusted_sentiment']
+
+def iter_full_text(df: pd.DataFrame):
+    """Yield title + description + comments per row without storing the joined text."""
+    comments = df['all_comments'] if 'all_comments' in df.columns else [''] * len(df)
+    for raw, com in zip(df['raw_text'], comments):
+        raw = raw if isinstance(raw, str) else ''
+        com = com if isinstance(com, str) else ''
+        yield f'{raw} {com}'.strip() if com else raw
+
+def _drop_embedded_comments(df: pd.DataFrame) -> None:
+    # Older snapshots append all_comments to raw_text; keep one copy of the comment text
+    if 'all_comments' not in df.columns:
+        return
+    def _strip(raw, com):
+        if isinstance(raw, str) and isinstance(com, str) and com and raw.endswith(com):
+            return raw[:-len(com)].rstrip()
+        return raw
+    df['raw_text'] = [_strip(r, c) for r, c in zip(df['raw_text'], df['all_comments'])]
 
 def enrich_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Add score columns; returns a shallow copy that shares the input's column data."""
     if df.empty:
         return df
-    df = df.copy()
-    # Build processed_text consistently
-    df['processed_text'] = df['raw_text'].fillna('').apply(preprocess_text)
+    df = df.copy(deep=False)
+    if 'all_comments' not in df.columns:
+        df['all_comments'] = ''
+    _drop_embedded_comments(df)
     # engagement_norm percentile
     if (df['engagement_metrics'].apply(lambda x: isinstance(x, dict) and x.get('engagement_score', 0) > 0)).any():
         df['engagement_score'] = df['engagement_metrics'].apply(lambda x: x.get('engagement_score', 0) if isinstance(x, dict) else 0)
@@ -23,19 +49,24 @@ def enrich_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         df['engagement_score'] = 0.0
         df['engagement_norm'] = 0.0
     # visibility weights
-    def _vis(row):
-        if row.get('platform') == 'YouTube':
-            metrics = row.get('engagement_metrics') or {}
+    def _vis(platform, metrics):
+        if platform == 'YouTube':
             try:
-                views = int(metrics.get('views', 0))
+                views = int((metrics or {}).get('views', 0))
             except Exception:
                 views = 0
             return min(5.0, np.log10(max(views, 1) + 1))
         return 1.0
-    df['visibility_weight'] = df.apply(_vis, axis=1)
-    # Ensure sentiment fields exist for downstream metrics
+    df['visibility_weight'] = [_vis(p, m) for p, m in zip(df.get('platform', [None] * len(df)), df['engagement_metrics'])]
+    # Brand-targeted sentiment: only windows around each brand mention are scored
+    if 'brand_sentiment' not in df.columns:
+        df['brand_sentiment'] = [brand_sentiment(t) for t in iter_full_text(df)]
     if 'brand_adjusted_sentiment' not in df.columns:
-        df['brand_adjusted_sentiment'] = df['processed_text'].apply(lambda t: sentiment_scores(t)['brand_adjusted'])
+        # Row score: Atomberg's window sentiment, else the mean over the brands present, else neutral
+        df['brand_adjusted_sentiment'] = [
+            d.get(BRAND_NAME, float(np.mean(list(d.values())))) if isinstance(d, dict) and d else 0.0
+            for d in df['brand_sentiment']
+        ]
     if 'sentiment_overall' not in df.columns:
         def _cls(s: float) -> str:
             if s > 0.1:
@@ -44,29 +75,57 @@ def enrich_dataframe(df: pd.DataFrame) -> pd.DataFrame:
                 return 'negative'
             return 'neutral'
         df['sentiment_overall'] = df['brand_adjusted_sentiment'].apply(_cls)
-    # comments text helper
-    if 'all_comments' not in df.columns:
-        df['all_comments'] = ''
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in FLOAT32_COLUMNS:
+        df[col] = df[col].astype(np.float32)
     return df
 
-def compute_metrics(df: pd.DataFrame) -> Dict:
-    if df.empty:
-        return {
-            'basic_sov': 0, 'engagement_sov': 0, 'sentiment_sov': 0, 'quality_sov': 0,
-            'visibility_weighted_sov': 0, 'composite_sov': 0, 'platform_sov': {},
-            'total_mentions': 0, 'atomberg_mentions': 0, 'competitor_mentions': {}, 'brand_benchmark': {}
-        }
-    df = df.copy()
-    # Ensure brand_mentions exists; if missing or empty, extract from raw_text
+def brand_sentiment_series(df: pd.DataFrame, brand: str) -> pd.Series:
+    """Sentiment around `brand` mentions per row, falling back to the row score."""
+    if 'brand_sentiment' not in df.columns:
+        return df['brand_adjusted_sentiment'].astype(float)
+    return pd.Series(
+        [d.get(brand, s) if isinstance(d, dict) else s for d, s in zip(df['brand_sentiment'], df['brand_adjusted_sentiment'])],
+        index=df.index, dtype=float,
+    )
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per column (deep, including Python string payloads), largest first."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'bytes': usage})
+    report = report.sort_values('bytes', ascending=False)
+    report['share_pct'] = report['bytes'] / max(int(report['bytes'].sum()), 1) * 100
+    return report
+
+def _composite_weights():
+    w_sum = max(1e-6, SOV_WEIGHT_BASIC + SOV_WEIGHT_ENGAGEMENT + SOV_WEIGHT_SENTIMENT + SOV_WEIGHT_VISIBILITY)
+    return (SOV_WEIGHT_BASIC / w_sum, SOV_WEIGHT_ENGAGEMENT / w_sum,
+            SOV_WEIGHT_SENTIMENT / w_sum, SOV_WEIGHT_VISIBILITY / w_sum)
+
+def comment_mentions_column(brand: str) -> str:
+    # Per-brand comment mention counts added by row_contributions
+    return 'comment_mentions_' + re.sub(r'\W+', '_', brand.lower()).strip('_')
+
+def row_contributions(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-row inputs to every SoV ratio; compute once and pass to compute_metrics and bootstrap_sov."""
+    # Shallow copy: new columns stay local, input column data is not duplicated
+    df = df.copy(deep=False)
+    # float32 is storage only; reductions and returned metrics stay float64
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(np.float64)
+    # Ensure brand_mentions exists; if missing or empty, extract from title, description and comments
     if 'brand_mentions' not in df.columns:
-        df['brand_mentions'] = df['raw_text'].apply(extract_brand_mentions)
+        df['brand_mentions'] = [extract_brand_mentions(t) for t in iter_full_text(df)]
     else:
         def _ensure_list(v, text):
             if isinstance(v, list) and v:
                 return v
             return extract_brand_mentions(text)
         df['brand_mentions'] = [
-            _ensure_list(v, t) for v, t in zip(df['brand_mentions'], df['raw_text'])
+            _ensure_list(v, t) for v, t in zip(df['brand_mentions'], iter_full_text(df))
         ]
     # Respect existing atomberg_mention if present; otherwise create case-insensitive
     if 'atomberg_mention' not in df.columns:
@@ -77,22 +136,17 @@ def compute_metrics(df: pd.DataFrame) -> Dict:
             except Exception:
                 return False
         df['atomberg_mention'] = df['brand_mentions'].apply(_ci_flag)
-    total_mentions = len(df)
-    atomberg_data = df[df['atomberg_mention'] == True]
-    atomberg_mentions = len(atomberg_data)
-    # Content mention SoV (titles+descriptions)
-    basic_sov = atomberg_mentions / total_mentions * 100 if total_mentions > 0 else 0
-    
-    # Comments-based mentions SoV
+    # Comments-based mention counts
     def _count_brand_in_comments(text: str, brand: str) -> int:
         if not isinstance(text, str) or not text:
             return 0
         return text.lower().count(brand.lower())
-    total_comment_mentions = sum(_count_brand_in_comments(t, b) for t in df.get('all_comments', '').astype(str) for b in [BRAND_NAME] + COMPETITOR_BRANDS)
-    atomberg_comment_mentions = sum(df.get('all_comments', '').astype(str).apply(lambda t: _count_brand_in_comments(t, BRAND_NAME)))
-    comments_sov = (atomberg_comment_mentions / total_comment_mentions * 100) if total_comment_mentions > 0 else 0
-    
-    df_eng = df[df['engagement_norm'] > 0]
+    comments_text = df.get('all_comments', '').astype(str)
+    brands_all = [BRAND_NAME] + COMPETITOR_BRANDS
+    for b in brands_all:
+        df[comment_mentions_column(b)] = comments_text.apply(lambda t: _count_brand_in_comments(t, b))
+    df['comment_mentions_total'] = df[[comment_mentions_column(b) for b in brands_all]].sum(axis=1)
+    df['comment_mentions_atomberg'] = df[comment_mentions_column(BRAND_NAME)]
     # Engagement share using actual video stats
     # comment count per video from fetched comments (fallback)
     if 'all_comments' in df.columns:
@@ -120,21 +174,19 @@ def compute_metrics(df: pd.DataFrame) -> Dict:
         _eng_value(m, c, l) for m, c, l in zip(df['engagement_metrics'], df['comment_count'], df.get('comment_likes', pd.Series([0]*len(df))))
     ]
     # Count towards Atomberg if content, comments, or channel title mentions brand variants
-    brand_regex = '|'.join([BRAND_NAME, BRAND_NAME.replace(' ', ''), BRAND_NAME.replace(' ', '-'), BRAND_NAME.replace(' ', '_'), 'atom berg'])
-    atomberg_any = df[(df['atomberg_mention']) |
-                      (df.get('raw_text', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
-                      (df.get('title', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
-                      (df.get('description', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
-                      (df.get('all_comments', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
-                      (df.get('channel_title', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
-                      (df.get('keyword', '').astype(str).str.contains('atomberg', case=False, na=False))]
+    brand_regex = '|'.join(re.escape(v) for v in brand_variants()[BRAND_NAME])
+    df['atomberg_any'] = ((df['atomberg_mention'] == True) |
+                          (df.get('raw_text', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
+                          (df.get('title', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
+                          (df.get('description', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
+                          (df.get('all_comments', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
+                          (df.get('channel_title', '').astype(str).str.contains(brand_regex, case=False, na=False)) |
+                          (df.get('keyword', '').astype(str).str.contains('atomberg', case=False, na=False)))
+    # Atomberg's share is taken before the minimum bump below (only the total sees it)
+    df['atomberg_eng_value'] = df['eng_value'].where(df['atomberg_any'], 0.0)
     # Ensure flagged Atomberg videos contribute minimally even if stats/comments unavailable
-    df.loc[atomberg_any.index, 'eng_value'] = df.loc[atomberg_any.index, 'eng_value'].replace(0, 1.0)
-    total_eng_value = df['eng_value'].sum()
-    atomberg_eng_value = atomberg_any['eng_value'].sum()
-    engagement_sov = atomberg_eng_value / total_eng_value * 100 if total_eng_value > 0 else 0
-    
-    # Positive share from comments mentioning Atomberg
+    df.loc[df['atomberg_any'], 'eng_value'] = df.loc[df['atomberg_any'], 'eng_value'].replace(0, 1.0)
+    # Positive share from comments mentioning Atomberg (None when no comment mentions it)
     def _pos_from_comments(text: str) -> int:
         if not isinstance(text, str) or not text:
             return 0
@@ -148,12 +200,39 @@ def compute_metrics(df: pd.DataFrame) -> Dict:
         if total == 0:
             return None
         return int(positives / total * 100)
-    pos_rates = []
-    for t in df.get('all_comments', '').astype(str):
-        r = _pos_from_comments(t)
-        if r is not None:
-            pos_rates.append(r)
-    sentiment_sov = float(np.mean(pos_rates)) if pos_rates else 0.0
+    df['comment_pos_rate'] = [
+        np.nan if r is None else float(r) for r in comments_text.apply(_pos_from_comments)
+    ]
+    return df
+
+def compute_metrics(df: pd.DataFrame, contributions: pd.DataFrame | None = None) -> Dict:
+    if df.empty:
+        return {
+            'basic_sov': 0, 'engagement_sov': 0, 'sentiment_sov': 0, 'quality_sov': 0,
+            'visibility_weighted_sov': 0, 'composite_sov': 0, 'platform_sov': {},
+            'total_mentions': 0, 'atomberg_mentions': 0, 'competitor_mentions': {}, 'brand_benchmark': {}
+        }
+    df = contributions if contributions is not None else row_contributions(df)
+    total_mentions = len(df)
+    atomberg_data = df[df['atomberg_mention'] == True]
+    atomberg_mentions = len(atomberg_data)
+    # Content mention SoV (titles+descriptions)
+    basic_sov = atomberg_mentions / total_mentions * 100 if total_mentions > 0 else 0
+    
+    # Comments-based mentions SoV
+    total_comment_mentions = df['comment_mentions_total'].sum()
+    atomberg_comment_mentions = df['comment_mentions_atomberg'].sum()
+    comments_sov = (atomberg_comment_mentions / total_comment_mentions * 100) if total_comment_mentions > 0 else 0
+    
+    df_eng = df[df['engagement_norm'] > 0]
+    atomberg_any = df[df['atomberg_any']]
+    total_eng_value = df['eng_value'].sum()
+    atomberg_eng_value = df['atomberg_eng_value'].sum()
+    engagement_sov = atomberg_eng_value / total_eng_value * 100 if total_eng_value > 0 else 0
+    
+    # Positive share from comments mentioning Atomberg
+    pos_rates = df['comment_pos_rate'].dropna()
+    sentiment_sov = float(np.mean(pos_rates)) if len(pos_rates) else 0.0
     
     # Quality SoV using eng_value weighted by sentiment score from content (fallback)
     atomberg_quality_score = (df_eng[df_eng['atomberg_mention'] == True]['engagement_norm'] * df_eng[df_eng['atomberg_mention'] == True]['brand_adjusted_sentiment'])
@@ -169,23 +248,20 @@ def compute_metrics(df: pd.DataFrame) -> Dict:
     for brand in COMPETITOR_BRANDS:
         bdata = df[df['brand_mentions'].apply(lambda x: brand in x)]
         if len(bdata) > 0:
+            bsent = brand_sentiment_series(bdata, brand)
             competitor_mentions[brand] = {
                 'mentions': len(bdata),
                 'sov': len(bdata) / total_mentions * 100,
-                'avg_sentiment': bdata['brand_adjusted_sentiment'].mean(),
+                'avg_sentiment': bsent.mean(),
                 'avg_engagement': bdata['engagement_norm'].mean(),
-                'positive_rate': (bdata['brand_adjusted_sentiment'] > 0.1).mean() * 100,
+                'positive_rate': (bsent > 0.1).mean() * 100,
                 'eng_value_sum': float(bdata['eng_value'].sum()),
                 'videos': int(len(bdata))
             }
     atomberg_visibility = atomberg_data['visibility_weight'].sum()
     total_visibility = df['visibility_weight'].sum()
     visibility_weighted_sov = atomberg_visibility / total_visibility * 100 if total_visibility > 0 else 0
-    w_sum = max(1e-6, SOV_WEIGHT_BASIC + SOV_WEIGHT_ENGAGEMENT + SOV_WEIGHT_SENTIMENT + SOV_WEIGHT_VISIBILITY)
-    wb = SOV_WEIGHT_BASIC / w_sum
-    we = SOV_WEIGHT_ENGAGEMENT / w_sum
-    ws = SOV_WEIGHT_SENTIMENT / w_sum
-    wv = SOV_WEIGHT_VISIBILITY / w_sum
+    wb, we, ws, wv = _composite_weights()
     composite_sov = wb * basic_sov + we * engagement_sov + ws * sentiment_sov + wv * visibility_weighted_sov
     brands_all = [BRAND_NAME] + COMPETITOR_BRANDS
     tv = max(1e-9, df['visibility_weight'].sum())
@@ -198,13 +274,16 @@ def compute_metrics(df: pd.DataFrame) -> Dict:
         bb = len(rows) / total_mentions * 100
         be = rows['engagement_norm'].sum() / te * 100 if te > 0 else 0
         bv = rows['visibility_weight'].sum() / tv * 100 if tv > 0 else 0
-        bp = (rows['brand_adjusted_sentiment'] > 0.1).mean() * 100
+        bsent = brand_sentiment_series(rows, b)
+        bp = (bsent > 0.1).mean() * 100
+        bc = df[comment_mentions_column(b)].sum() / total_comment_mentions * 100 if total_comment_mentions > 0 else 0
         comp = wb * bb + we * be + ws * bp + wv * bv
         benchmark[b] = {
             'basic_sov': bb,
             'engagement_sov': be,
             'sentiment_positive_rate': bp,
             'visibility_sov': bv,
+            'comments_sov': float(bc),
             'composite_sov': comp,
             'eng_value_sum': float(rows['eng_value'].sum()),
             'videos': int(len(rows))
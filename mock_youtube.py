@@ -0,0 +1,248 @@
+"""Local stand-in for the YouTube Data API v3 (search, videos, commentThreads).
+
+Serves data from a saved snapshot in reports/ so collectors can be exercised
+offline. Point collectors at it with YOUTUBE_API_BASE_URL=http://127.0.0.1:8765
+
+    python mock_youtube.py [snapshot.csv] --port 8765 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from collectors import _video_id
+from config import REPORTS_DIR
+
+# Quota cost per call, as documented for the real API
+QUOTA_COSTS = {'search': 100, 'videos': 1, 'commentThreads': 1}
+
+
+class _BadRequest(Exception):
+    """Answered with 400 and the exception message as the error reason."""
+
+
+def _latest_snapshot() -> str | None:
+    files = sorted(glob.glob(os.path.join(REPORTS_DIR, 'sov_extracted_*.csv')))
+    return files[-1] if files else None
+
+
+def _fake_stats(video_id: str) -> Dict:
+    # Deterministic per video so repeated runs see the same numbers
+    h = int(hashlib.md5(video_id.encode('utf-8')).hexdigest()[:8], 16)
+    views = 1000 + h % 500000
+    return {'viewCount': str(views), 'likeCount': str(views // 40), 'commentCount': str(views // 400)}
+
+
+class MockData:
+    def __init__(self, csv_path: str):
+        df = pd.read_csv(csv_path)
+        self.videos: Dict[str, Dict] = {}
+        self.by_keyword: Dict[str, List[str]] = {}
+        self.comments: Dict[str, List[str]] = {}
+        for row in df.to_dict('records'):
+            vid = _video_id(row.get('url'))
+            if not vid:
+                continue
+            self.by_keyword.setdefault(str(row.get('keyword', '')).lower(), []).append(vid)
+            if vid in self.videos:
+                continue
+            self.videos[vid] = {
+                'title': str(row.get('title') or ''),
+                'description': str(row.get('description') or ''),
+                'channelTitle': str(row.get('channel_title') or ''),
+            }
+            text = row.get('all_comments')
+            self.comments[vid] = [c for c in str(text).split('\n') if c.strip()] if isinstance(text, str) else []
+        self.all_ids = list(self.videos)
+
+    def search(self, q: str) -> List[str]:
+        # Unknown keywords fall back to the whole snapshot
+        return self.by_keyword.get(q.lower()) or self.all_ids
+
+
+class MockYouTubeServer:
+    """Threaded HTTP server with latency, paging, error injection and quota accounting."""
+
+    def __init__(self, csv_path: str | None = None, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, page_size: int = 50,
+                 error_rate: float = 0.0, error_codes=(403, 429, 500, 503),
+                 quota_limit: int | None = None, comments_disabled=(), seed: int = 0):
+        csv_path = csv_path or _latest_snapshot()
+        if not csv_path:
+            raise FileNotFoundError('No snapshot CSV found in reports/ for the mock server.')
+        self.data = MockData(csv_path)
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = max(1, page_size)
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.quota_limit = quota_limit
+        # Videos whose commentThreads answer 403 commentsDisabled, as the real API does
+        self.comments_disabled = set(comments_disabled)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = {k: 0 for k in QUOTA_COSTS}
+            self.errors: Dict[int, int] = {}
+            self.quota_used = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'total_requests': sum(self.requests.values()),
+                'errors': dict(self.errors),
+                'quota_used': self.quota_used,
+            }
+
+    def start(self) -> 'MockYouTubeServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _account(self, endpoint: str) -> (int | None, str):
+        """Record a call and return an error status and reason to inject, if any."""
+        with self._lock:
+            self.requests[endpoint] += 1
+            status, reason = None, ''
+            if self.quota_limit is not None and self.quota_used + QUOTA_COSTS[endpoint] > self.quota_limit:
+                status, reason = 403, 'quotaExceeded'
+            else:
+                # The real API charges failed calls too
+                self.quota_used += QUOTA_COSTS[endpoint]
+                if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                    status = self._rng.choice(self.error_codes)
+                    reason = 'forbidden' if status == 403 else 'rateLimitExceeded' if status == 429 else 'backendError'
+            if status is not None:
+                self.errors[status] = self.errors.get(status, 0) + 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        return status, reason
+
+    def _page(self, items: List, params: Dict, cap: int) -> Dict:
+        size = min(self.page_size, cap, int(params.get('maxResults', cap) or cap))
+        token = params.get('pageToken') or '0'
+        if not token.isdigit():
+            raise _BadRequest('invalidPageToken')
+        start = int(token)
+        body = {'items': items[start:start + size]}
+        if start + size < len(items):
+            body['nextPageToken'] = str(start + size)
+        return body
+
+    def _search(self, params: Dict) -> Dict:
+        ids = self.data.search(params.get('q', ''))
+        page = self._page(ids, params, 50)
+        page['items'] = [
+            {'kind': 'youtube#searchResult', 'id': {'kind': 'youtube#video', 'videoId': vid}, 'snippet': self.data.videos[vid]}
+            for vid in page['items']
+        ]
+        return page
+
+    def _videos(self, params: Dict) -> Dict:
+        ids = [v for v in params.get('id', '').split(',') if v]
+        return {'items': [{'id': vid, 'statistics': _fake_stats(vid)} for vid in ids[:50] if vid in self.data.videos]}
+
+    def _comment_threads(self, params: Dict) -> Dict:
+        texts = self.data.comments.get(params.get('videoId', ''), [])
+        page = self._page(texts, params, 100)
+        page['items'] = [
+            {'snippet': {'topLevelComment': {'snippet': {'textDisplay': t, 'likeCount': len(t) % 7}}}}
+            for t in page['items']
+        ]
+        return page
+
+    def _handler(self):
+        server = self
+        routes = {'search': server._search, 'videos': server._videos, 'commentThreads': server._comment_threads}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                endpoint = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if endpoint not in routes:
+                    return self._send(404, {'error': {'code': 404, 'message': 'Not found'}})
+                if not params.get('key'):
+                    return self._send(400, {'error': {'code': 400, 'message': 'API key missing'}})
+                status, reason = server._account(endpoint)
+                if status is None and endpoint == 'commentThreads' and params.get('videoId') in server.comments_disabled:
+                    status, reason = 403, 'commentsDisabled'
+                if status is not None:
+                    return self._send(status, {'error': {'code': status, 'errors': [{'reason': reason}]}})
+                try:
+                    body = routes[endpoint](params)
+                except _BadRequest as e:
+                    return self._send(400, {'error': {'code': 400, 'errors': [{'reason': str(e)}]}})
+                self._send(200, body)
+
+            def _send(self, status: int, body: Dict):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a reports/ snapshot as a mock YouTube Data API.')
+    parser.add_argument('csv', nargs='?', default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra uniform random latency (seconds)')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of calls answered with 403/429/5xx')
+    parser.add_argument('--quota', type=int, default=None, help='daily quota units before 403 quotaExceeded')
+    args = parser.parse_args()
+    server = MockYouTubeServer(args.csv, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                               page_size=args.page_size, error_rate=args.error_rate, quota_limit=args.quota)
+    print(f'Mock YouTube API on {server.url} ({len(server.data.videos)} videos)')
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+        server._httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,14 +2,13 @@ from typing import Dict, List
 import re
 import pandas as pd
 import numpy as np
-from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.stem import WordNetLemmatizer
 
-from config import BRAND_NAME, COMPETITOR_BRANDS
+from config import BRAND_NAME, COMPETITOR_BRANDS, SENTIMENT_WINDOW_TOKENS
 
 _vader = SentimentIntensityAnalyzer()
 _lemm = WordNetLemmatizer()
@@ -26,17 +25,64 @@ def preprocess_text(text: str) -> str:
     tokens = [_lemm.lemmatize(t) for t in tokens if t not in _stop and len(t) > 2]
     return ' '.join(tokens)
 
-def sentiment_scores(text: str) -> Dict:
+def sentiment_scores(text: str, with_textblob: bool = False) -> Dict:
+    # TextBlob polarity is opt-in; nothing downstream reads it
     if not text:
-        return {'vader': 0.0, 'textblob': 0.0, 'brand_adjusted': 0.0}
+        scores = {'vader': 0.0, 'brand_adjusted': 0.0}
+        if with_textblob:
+            scores['textblob'] = 0.0
+        return scores
     v = _vader.polarity_scores(text)['compound']
-    tb = TextBlob(text).sentiment.polarity
-    return {'vader': v, 'textblob': tb, 'brand_adjusted': v}
+    scores = {'vader': v, 'brand_adjusted': v}
+    if with_textblob:
+        from textblob import TextBlob
+        scores['textblob'] = TextBlob(text).sentiment.polarity
+    return scores
 
-def extract_brand_mentions(text: str) -> List[str]:
+_SENTENCE_END = re.compile(r'[.!?\n]')
+
+def brand_variants() -> Dict[str, List[str]]:
+    """Canonical brand -> spellings matched case-insensitively in text."""
     # include common variants and spacing issues
-    variants = [BRAND_NAME, BRAND_NAME.replace(' ', ''), BRAND_NAME.replace(' ', '-'), BRAND_NAME.replace(' ', '_'), 'atom berg']
-    brands = list(dict.fromkeys(variants + COMPETITOR_BRANDS))
+    own = [BRAND_NAME, BRAND_NAME.replace(' ', ''), BRAND_NAME.replace(' ', '-'), BRAND_NAME.replace(' ', '_'), 'atom berg']
+    out = {BRAND_NAME: list(dict.fromkeys(own))}
+    for b in COMPETITOR_BRANDS:
+        out.setdefault(b, [b])
+    return out
+
+def mention_windows(text: str, variants: List[str], window: int = SENTIMENT_WINDOW_TOKENS) -> List[str]:
+    """Sentence around each mention, clipped to `window` tokens either side."""
+    if not isinstance(text, str) or not text:
+        return []
+    tl = text.lower()
+    out = []
+    for v in dict.fromkeys(x.lower() for x in variants):
+        # Whole words only, so 'orient' inside 'orientation' is not a mention
+        for hit in re.finditer(r'\b' + re.escape(v) + r'\b', tl):
+            start, end = hit.span()
+            left = max(text.rfind(c, 0, start) for c in '.!?\n') + 1
+            m = _SENTENCE_END.search(text, end)
+            right = m.start() if m else len(text)
+            before = text[left:start].split()[-window:] if window > 0 else []
+            after = text[end:right].split()[:window] if window > 0 else []
+            out.append(' '.join(before + [text[start:end]] + after))
+    return out
+
+def brand_sentiment(text: str, window: int = SENTIMENT_WINDOW_TOKENS) -> Dict[str, float]:
+    """Mean VADER compound of the windows around each brand's mentions.
+
+    Only brands that occur in the text get a score; text without any brand
+    mention is never scored.
+    """
+    scores: Dict[str, float] = {}
+    for brand, variants in brand_variants().items():
+        windows = mention_windows(text, variants, window)
+        if windows:
+            scores[brand] = float(np.mean([_vader.polarity_scores(w)['compound'] for w in windows]))
+    return scores
+
+def extract_brand_mentions(text: str) -> List[str]:
+    brands = list(dict.fromkeys(v for variants in brand_variants().values() for v in variants))
     found = []
     tl = (text or '').lower()
     for b in brands:
@@ -61,6 +61,8 @@ class AtombergAIAgent:
 
     def _plot_sentiment_distribution(self, ax, df: pd.DataFrame):
         sentiment_counts = df.get('sentiment_overall', pd.Series([], dtype=str)).value_counts()
+        # categorical columns report unused categories with a zero count
+        sentiment_counts = sentiment_counts[sentiment_counts > 0]
         if sentiment_counts.empty:
             ax.text(0.5, 0.5, 'No sentiment data', ha='center', va='center', transform=ax.transAxes)
             ax.set_title('Sentiment Distribution', fontweight='bold')